@@ -0,0 +1,333 @@
+# benchmark.py
+"""
+Offline end-to-end benchmark for the voice assistant loop in main.py.
+
+Drives run_assistant() from a script of utterances instead of a microphone,
+answers with a local fake Gemini backend (configurable latency, history cost
+and token-streaming time) and plays replies into a null TTS sink. No network, audio
+device or API key is needed.
+
+Script format: one utterance per line, blank lines and '#' comments ignored.
+The run ends when the script is used up (an 'exit' line ends it early).
+A line naming a .wav file is treated as spoken input; its transcript is read
+from a .txt file next to it (or the file name) and listening takes as long as
+the audio, scaled by --audio-speed.
+
+    python benchmark.py --rounds 20 --latency-ms 300 --chunks 12
+"""
+import os
+import sys
+import json
+import time
+import wave
+import random
+import argparse
+import tempfile
+
+# Tracing feeds the per-stage numbers, so turn it on before main.py is imported,
+# whatever the shell exported. The DB and trace paths are pointed at a
+# temporary directory in run_benchmark().
+os.environ["ASSISTANT_TRACE"] = "1"
+
+import main as assistant
+from tracing import tracer, percentile
+
+DEFAULT_SCRIPT = [
+    "Hello, who are you?",
+    "What is the capital of France?",
+    "schedule",
+    "Buy groceries after work",
+    "What are my tasks?",
+    "Tell me a short joke.",
+    "switch to voice",
+    "How far away is the moon?",
+    "switch to text",
+    "Summarize what we talked about.",
+]
+
+FAKE_REPLY = ("Sure. Here is a *helpful* answer to your question. "
+              "It has a few sentences, like a typical spoken reply. "
+              "Let me know if you need anything else!")
+
+
+# -----------------------------
+#  FAKE GEMINI BACKEND
+# -----------------------------
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModels:
+    """
+    Stand-in for client.models.generate_content().
+
+    The model side of streaming is simulated: a reply takes the first-token
+    latency plus one chunk_ms per further chunk, and arrives whole, as it
+    does for main.py's blocking call.
+
+    Calls and injected failures are counted per logical request: after an
+    injected failure, the next call is main.py's fallback for the same
+    request. It is counted as a retry and always succeeds.
+    """
+
+    def __init__(self, latency_ms=200, jitter_ms=0, per_message_ms=0,
+                 chunk_ms=20, chunks=8, fail_rate=0.0, reply=FAKE_REPLY, seed=0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.per_message_ms = per_message_ms
+        self.chunk_ms = chunk_ms
+        self.chunks = chunks
+        self.fail_rate = fail_rate
+        self.reply = reply
+        self.random = random.Random(seed)
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.retrying = False
+        self.history_sizes = []
+
+    def _first_token_delay(self, contents):
+        # Cost grows with the amount of history sent, like a real model
+        messages = len(contents) if isinstance(contents, list) else 1
+        delay = self.latency_ms + messages * self.per_message_ms
+        if self.jitter_ms:
+            delay += self.random.uniform(-self.jitter_ms, self.jitter_ms)
+        delay = max(delay, 0) / 1000
+
+        if self.retrying:
+            self.retrying = False
+            self.retries += 1
+            return delay
+
+        self.calls += 1
+        self.history_sizes.append(messages)
+        if self.fail_rate and self.random.random() < self.fail_rate:
+            self.failures += 1
+            self.retrying = True
+            time.sleep(delay)
+            raise RuntimeError("Fake backend error (injected)")
+        return delay
+
+    def generate_content(self, model, contents):
+        time.sleep(self._first_token_delay(contents))
+        # Full reply arrives at once, after every chunk would have been produced
+        time.sleep(self.chunk_ms * max(self.chunks - 1, 0) / 1000)
+        return FakeResponse(self.reply)
+
+
+class FakeClient:
+    def __init__(self, **options):
+        self.models = FakeModels(**options)
+
+
+# -----------------------------
+#  NULL TTS SINK
+# -----------------------------
+class NullTTS:
+    """
+    Queue-like TTS sink. Playback takes len(text) / chars_per_sec seconds
+    (0 = instant) and overlaps with whatever the loop does after put().
+    """
+
+    def __init__(self, chars_per_sec=0):
+        self.chars_per_sec = chars_per_sec
+        self.busy_until = 0.0
+        self.utterances = 0
+        self.first_audio = None
+
+    def put(self, text):
+        if text is None:
+            return
+        now = time.perf_counter()
+        if self.first_audio is None:
+            self.first_audio = now
+        self.utterances += 1
+        duration = len(text) / self.chars_per_sec if self.chars_per_sec else 0.0
+        self.busy_until = max(self.busy_until, now) + duration
+
+    def join(self):
+        remaining = self.busy_until - time.perf_counter()
+        if remaining > 0:
+            time.sleep(remaining)
+
+
+# -----------------------------
+#  SCRIPTED INPUT
+# -----------------------------
+def wav_transcript(path):
+    """Transcript for a WAV input: sidecar .txt if present, else the file name"""
+    sidecar = os.path.splitext(path)[0] + ".txt"
+    if os.path.exists(sidecar):
+        with open(sidecar, encoding="utf-8") as f:
+            return f.read().strip()
+    return os.path.splitext(os.path.basename(path))[0].replace("_", " ")
+
+
+def wav_duration(path):
+    with wave.open(path, "rb") as w:
+        return w.getnframes() / float(w.getframerate())
+
+
+class ScriptFinished(Exception):
+    """Raised by ScriptedInput when every line has been replayed"""
+
+
+class ScriptedInput:
+    """read_input() replacement that replays a script and records response times"""
+
+    def __init__(self, lines, tts, audio_speed=0.0, stt_ms=0):
+        self.lines = list(lines)
+        self.position = 0
+        self.tts = tts
+        self.audio_speed = audio_speed
+        self.stt_ms = stt_ms
+        self.given_at = None
+        self.first_audio_ms = []
+
+    def _close_turn(self):
+        # Time from handing out the last utterance to its first queued audio
+        if self.given_at is not None and self.tts.first_audio is not None:
+            self.first_audio_ms.append((self.tts.first_audio - self.given_at) * 1000)
+        self.tts.first_audio = None
+
+    def __call__(self, input_mode, mic_index=None):
+        self._close_turn()
+        if self.position >= len(self.lines):
+            # Stop here instead of falling into the real no-input handling
+            raise ScriptFinished()
+        line = self.lines[self.position]
+        self.position += 1
+        if line.lower().endswith(".wav"):
+            with tracer.span("listen"):
+                if self.audio_speed:
+                    time.sleep(wav_duration(line) / self.audio_speed)
+            with tracer.span("recognize"):
+                time.sleep(self.stt_ms / 1000)
+                line = wav_transcript(line)
+        self.given_at = time.perf_counter()
+        return line
+
+
+def load_script(path):
+    if not path:
+        return DEFAULT_SCRIPT
+    base = os.path.dirname(os.path.abspath(path))
+    lines = []
+    with open(path, encoding="utf-8") as f:
+        for raw in f:
+            line = raw.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.lower().endswith(".wav") and not os.path.isabs(line):
+                line = os.path.join(base, line)
+            lines.append(line)
+    return lines
+
+
+# -----------------------------
+#  BENCHMARK
+# -----------------------------
+def run_benchmark(args):
+    client = FakeClient(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                        per_message_ms=args.per_message_ms, chunk_ms=args.chunk_ms,
+                        chunks=args.chunks, fail_rate=args.fail_rate, seed=args.seed)
+    tts = NullTTS(chars_per_sec=args.tts_cps)
+    script = load_script(args.script) * args.rounds
+    scripted = ScriptedInput(script, tts, audio_speed=args.audio_speed, stt_ms=args.stt_ms)
+
+    if not tracer.enabled:
+        raise RuntimeError("Tracing is disabled: tracing.py was imported before benchmark.py "
+                           "without ASSISTANT_TRACE=1, so there would be nothing to report.")
+    assistant.tts_queue = tts
+
+    # Never touch the real schedule DB or trace directory
+    with tempfile.TemporaryDirectory(prefix="assistant-bench-") as tmp_dir:
+        assistant.DB_PATH = os.path.join(tmp_dir, "schedule.db")
+        tracer.trace_dir = os.path.join(tmp_dir, "traces")
+
+        # Keep the assistant's own console output out of the report
+        stdout = sys.stdout
+        sys.stdout = open(os.devnull, "w", encoding="utf-8") if not args.verbose else stdout
+        start = time.perf_counter()
+        finished = False
+        try:
+            assistant.init_database()
+            assistant.run_assistant(client, input_mode='text', read_input=scripted)
+        except ScriptFinished:
+            finished = True
+        finally:
+            elapsed = time.perf_counter() - start
+            if sys.stdout is not stdout:
+                sys.stdout.close()
+            sys.stdout = stdout
+        # When the script ran out, the open turn is incomplete; keep it out of the numbers
+        tracer.end_turn(no_input=finished)
+        tracer.close()
+
+    if not finished:
+        print(f"[WARNING] Assistant exited after {scripted.position} of {len(scripted.lines)} "
+              f"script lines; the rest were not replayed.", file=sys.stderr)
+
+    turns = tracer.counts["turn"]
+    first_audio = sorted(scripted.first_audio_ms)
+    return {
+        "turns": turns,
+        "utterances": scripted.position,
+        "llm_calls": client.models.calls,
+        "llm_failures": client.models.failures,
+        "llm_retries": client.models.retries,
+        "max_history": max(client.models.history_sizes, default=0),
+        "elapsed_s": elapsed,
+        "turns_per_s": turns / elapsed if elapsed else 0.0,
+        "first_audio_ms": {f"p{int(q * 100)}": percentile(first_audio, q) for q in (0.5, 0.95, 0.99)},
+        "stages_ms": tracer.summary(),
+    }
+
+
+def print_report(result, args):
+    print("=" * 60)
+    print("Voice Assistant Benchmark")
+    print("=" * 60)
+    print(f"LLM latency: {args.latency_ms}ms first token, {args.chunks} chunks {args.chunk_ms}ms apart "
+          f"(+{args.per_message_ms}ms/message) | TTS: {args.tts_cps or 'instant'} chars/s")
+    print(f"Turns: {result['turns']}  Utterances: {result['utterances']}  "
+          f"Max history sent: {result['max_history']} messages")
+    print(f"LLM requests: {result['llm_calls']}  Injected failures: {result['llm_failures']}  "
+          f"Fallback retries: {result['llm_retries']}")
+    print(f"Elapsed: {result['elapsed_s']:.2f}s  Throughput: {result['turns_per_s']:.2f} turns/s")
+    fa = result["first_audio_ms"]
+    print(f"Time to first audio (ms): p50={fa['p50']:.1f} p95={fa['p95']:.1f} p99={fa['p99']:.1f}")
+    print("-" * 60)
+    print(f"{'stage':<12}{'count':>7}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for stage, stats in sorted(result["stages_ms"].items()):
+        print(f"{stage:<12}{stats['count']:>7}{stats['p50']:>10.2f}{stats['p95']:>10.2f}{stats['p99']:>10.2f}")
+    print("=" * 60)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmark for the voice assistant loop")
+    parser.add_argument("--script", help="utterance script (default: built-in conversation)")
+    parser.add_argument("--rounds", type=int, default=5, help="times to replay the script")
+    parser.add_argument("--latency-ms", type=float, default=200, help="fake LLM time to first token")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="uniform +/- jitter on LLM latency")
+    parser.add_argument("--per-message-ms", type=float, default=0, help="extra LLM latency per history message")
+    parser.add_argument("--chunk-ms", type=float, default=20, help="fake LLM generation time per chunk")
+    parser.add_argument("--chunks", type=int, default=8, help="chunks the fake LLM generates per reply")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of LLM calls that raise")
+    parser.add_argument("--tts-cps", type=float, default=0, help="simulated TTS playback chars/sec (0 = instant)")
+    parser.add_argument("--audio-speed", type=float, default=0, help="WAV playback speed for listening (0 = skip)")
+    parser.add_argument("--stt-ms", type=float, default=0, help="simulated recognition time for WAV inputs")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print the result as JSON")
+    parser.add_argument("--verbose", action="store_true", help="show the assistant's own output")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    result = run_benchmark(args)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_report(result, args)
@@ -0,0 +1,272 @@
+import os
+import time
+import queue
+import sqlite3
+import threading
+import numpy as np
+
+# ===========================
+#   DETECTION EVENT LOG
+# ===========================
+# The recognition loop only drops events into an in-memory queue; a writer
+# thread batches them into SQLite so logging never stalls a frame.
+
+DB_FILE = "detections.db"
+RETENTION_DAYS = 30
+BATCH_SIZE = 500          # rows per transaction
+FLUSH_INTERVAL = 1.0      # seconds, max delay before a partial batch is written
+PRUNE_INTERVAL = 3600     # seconds between retention clean-ups
+QUEUE_SIZE = 20000        # events buffered before new ones are dropped
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS detections (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    camera TEXT NOT NULL,
+    event TEXT NOT NULL,
+    label TEXT,
+    identity TEXT,
+    similarity REAL,
+    distance REAL,
+    duration REAL,
+    outcome TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_detections_ts ON detections (ts);
+CREATE INDEX IF NOT EXISTS idx_detections_camera_ts ON detections (camera, ts);
+CREATE INDEX IF NOT EXISTS idx_detections_identity_ts ON detections (identity, ts);
+"""
+
+INSERT = """
+INSERT INTO detections (ts, camera, event, label, identity, similarity, distance, duration, outcome)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+_STOP = object()
+
+
+def _connect(db_path):
+    conn = sqlite3.connect(db_path, timeout=10)
+    # WAL lets the query API read while the writer thread is inserting
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def _connect_readonly(db_path):
+    """Open an existing log for queries without creating or modifying it"""
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(f"Detection log '{db_path}' not found. Run security.py first.")
+    return sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, timeout=10)
+
+
+class DetectionLog:
+    """
+    Asynchronous, batched log of recognition results, unknown-person
+    intervals and alert outcomes.
+
+    Events:
+        frame          one recognition result (label, identity, similarity, distance)
+        unknown_start  an unknown person appeared
+        unknown_end    the unknown person left (duration in seconds)
+        alert          an alert was attempted (outcome "sent" / "failed")
+    """
+
+    def __init__(self, db_path=DB_FILE, camera="0", retention_days=RETENTION_DAYS,
+                 batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.db_path = db_path
+        self.camera = str(camera)
+        self.retention_days = retention_days
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self.dropped = 0
+        self.written = 0
+
+        conn = _connect(db_path)
+        conn.executescript(SCHEMA)
+        conn.close()
+
+        self.thread = threading.Thread(target=self._writer, name="detection-log", daemon=True)
+        self.thread.start()
+
+    # ---------- hot path ----------
+    def log(self, event, label=None, identity=None, similarity=None, distance=None,
+            duration=None, outcome=None, ts=None):
+        """Queue one event; never blocks, drops the event if the queue is full"""
+        row = (ts or time.time(), self.camera, event, label, identity,
+               None if similarity is None else float(similarity),
+               None if distance is None else float(distance),
+               duration, outcome)
+        try:
+            self.queue.put_nowait(row)
+        except queue.Full:
+            self.dropped += 1
+
+    # ---------- writer thread ----------
+    def _writer(self):
+        conn = _connect(self.db_path)
+        next_prune = 0.0
+        running = True
+
+        while running:
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    row = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if row is _STOP:
+                    running = False
+                    break
+                batch.append(row)
+
+            if batch:
+                try:
+                    with conn:
+                        conn.executemany(INSERT, batch)
+                    self.written += len(batch)
+                except sqlite3.Error as e:
+                    print("❌ Detection log write failed:", e)
+
+            if time.monotonic() >= next_prune:
+                self._prune(conn)
+                next_prune = time.monotonic() + PRUNE_INTERVAL
+
+        conn.close()
+
+    def _prune(self, conn):
+        """Delete events older than the retention period"""
+        if not self.retention_days:
+            return
+        cutoff = time.time() - self.retention_days * 86400
+        try:
+            with conn:
+                conn.execute("DELETE FROM detections WHERE ts < ?", (cutoff,))
+        except sqlite3.Error as e:
+            print("❌ Detection log prune failed:", e)
+
+    def close(self, timeout=5):
+        """Flush everything still queued and stop the writer thread"""
+        try:
+            self.queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        self.thread.join(timeout=timeout)
+        # Anything left means the writer is stuck or has died
+        unflushed = self.queue.qsize()
+        if self.thread.is_alive() or unflushed:
+            print(f"❌ Detection log writer did not finish; ~{unflushed} events not written")
+        if self.dropped:
+            print(f"⚠ Detection log dropped {self.dropped} events (queue full)")
+
+    # ---------- query API ----------
+    def similarity_distribution(self, **filters):
+        """See the module-level similarity_distribution()"""
+        return similarity_distribution(self.db_path, **filters)
+
+    def unknown_intervals(self, **filters):
+        """See the module-level unknown_intervals()"""
+        return unknown_intervals(self.db_path, **filters)
+
+
+# ===========================
+#   QUERIES
+# ===========================
+def similarity_distribution(db_path=DB_FILE, identity=None, since=None, until=None,
+                            camera=None, bins=20):
+    """
+    Read-only; does not need a running DetectionLog. Raises FileNotFoundError
+    if db_path does not exist.
+
+    Similarity-score distribution of 'frame' events per identity.
+
+    Returns {identity: {"count", "mean", "min", "max", "p5", "p50", "p95",
+                        "known_rate", "histogram": [(bin_start, count), ...]}}
+    with the histogram covering similarity -1..1 in equal-width bins.
+    """
+    query = "SELECT identity, similarity, label FROM detections WHERE event = 'frame' AND similarity IS NOT NULL"
+    params = []
+    if identity is not None:
+        query += " AND identity = ?"
+        params.append(identity)
+    if camera is not None:
+        query += " AND camera = ?"
+        params.append(str(camera))
+    if since is not None:
+        query += " AND ts >= ?"
+        params.append(since)
+    if until is not None:
+        query += " AND ts < ?"
+        params.append(until)
+
+    conn = _connect_readonly(db_path)
+    try:
+        rows = conn.execute(query, params).fetchall()
+    finally:
+        conn.close()
+
+    grouped = {}
+    for ident, similarity, label in rows:
+        scores, known = grouped.setdefault(ident, ([], [0]))
+        scores.append(similarity)
+        if label == "known":
+            known[0] += 1
+
+    edges = np.linspace(-1.0, 1.0, bins + 1)
+    result = {}
+    for ident, (scores, known) in grouped.items():
+        scores = np.array(scores)
+        counts, _ = np.histogram(np.clip(scores, -1.0, 1.0), bins=edges)
+        p5, p50, p95 = np.percentile(scores, [5, 50, 95])
+        result[ident] = {
+            "count": len(scores),
+            "mean": float(scores.mean()),
+            "min": float(scores.min()),
+            "max": float(scores.max()),
+            "p5": float(p5),
+            "p50": float(p50),
+            "p95": float(p95),
+            "known_rate": known[0] / len(scores),
+            "histogram": [(float(edge), int(c)) for edge, c in zip(edges[:-1], counts)],
+        }
+    return result
+
+def unknown_intervals(db_path=DB_FILE, since=None, camera=None):
+    """Return (start_ts, duration) for each finished unknown-person interval (read-only)"""
+    query = "SELECT ts, duration FROM detections WHERE event = 'unknown_end'"
+    params = []
+    if camera is not None:
+        query += " AND camera = ?"
+        params.append(str(camera))
+    if since is not None:
+        query += " AND ts >= ?"
+        params.append(since)
+    query += " ORDER BY ts"
+
+    conn = _connect_readonly(db_path)
+    try:
+        return [(ts - duration, duration) for ts, duration in conn.execute(query, params)]
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    # Print similarity stats per identity to help tune THRESHOLD
+    try:
+        dist = similarity_distribution()
+    except FileNotFoundError as e:
+        print("❌ Error:", e)
+        exit()
+
+    for ident, stats in dist.items():
+        print(f"➡ {ident}: {stats['count']} frames, known {stats['known_rate']:.0%}")
+        print(f"   similarity mean={stats['mean']:.3f} p5={stats['p5']:.3f} "
+              f"p50={stats['p50']:.3f} p95={stats['p95']:.3f} "
+              f"(min {stats['min']:.3f}, max {stats['max']:.3f})")
+        peak = max(c for _, c in stats["histogram"]) or 1
+        for edge, count in stats["histogram"]:
+            if count:
+                print(f"   {edge:+.2f} | {'█' * max(1, int(30 * count / peak))} {count}")
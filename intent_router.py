@@ -0,0 +1,161 @@
+# intent_router.py
+"""
+Local fast-path intent router for the voice assistant.
+
+Built-in commands (mode switches, scheduling, schedule queries, exit) are
+described once in COMMAND_TABLE and compiled into a single regular
+expression, so a command resolves with one match call instead of a chain of
+substring checks and never needs a round trip to Gemini.
+
+Phrasing that the table misses can optionally be resolved by a tiny local
+classifier (nearest example phrase by string similarity). Anything that is
+still unmatched is left for the LLM.
+"""
+import os
+import re
+import difflib
+from collections import Counter
+
+# -----------------------------
+#  COMMAND TABLE
+# -----------------------------
+# Entries are checked in order, first match wins.
+#   "contains" -> phrase may appear anywhere in the utterance (whole words)
+#   "exact"    -> the whole utterance must be one of the phrases
+#   "fuzzy"    -> the local classifier may pick this intent for near misses;
+#                 off by default, only for commands that are cheap to undo
+#   "requires" -> words that must appear exactly before a fuzzy match counts
+COMMAND_TABLE = [
+    {
+        "intent": "switch_text",
+        "match": "contains",
+        "fuzzy": True,
+        "requires": ["text"],
+        "phrases": ["switch to text", "text mode", "use text"],
+    },
+    {
+        "intent": "switch_voice",
+        "match": "contains",
+        "fuzzy": True,
+        "requires": ["voice"],
+        "phrases": ["switch to voice", "voice mode", "use voice"],
+    },
+    {
+        "intent": "schedule_task",
+        "match": "exact",
+        "fuzzy": True,
+        "phrases": ["schedule", "shedule"],
+    },
+    {
+        "intent": "list_schedules",
+        "match": "contains",
+        # "scheduled" keeps queries like "whats scheduled for today" local
+        "phrases": ["schedule", "schedules", "scheduled", "tasks", "task", "what do i have",
+                    "what's scheduled", "show me my schedule", "tell me my schedule",
+                    "what are my tasks"],
+    },
+    {
+        "intent": "exit",
+        "match": "exact",
+        "phrases": ["exit", "quit", "stop", "goodbye"],
+    },
+]
+
+# Fuzzy matching only looks at short utterances, longer ones are real questions,
+# and skips very short ones where one typo already means a different word
+FUZZY_MAX_WORDS = 5
+FUZZY_MIN_CHARS = 6
+FUZZY_THRESHOLD = 0.88
+
+_PUNCTUATION = re.compile(r"[^\w\s']+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize(text):
+    """Lowercase, drop punctuation and collapse whitespace"""
+    text = _PUNCTUATION.sub(" ", text.lower())
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def compile_table(table):
+    """
+    Compile the command table into one pattern with a named group per intent.
+    The pattern is used with re.match, so alternatives are tried in table
+    order and "contains" entries scan forward with a lazy prefix.
+    """
+    alternatives = []
+    for entry in table:
+        # Longest phrases first so "schedules" is not cut short by "schedule"
+        phrases = sorted((normalize(p) for p in entry["phrases"]), key=len, reverse=True)
+        body = "|".join(re.escape(p) for p in phrases)
+        group = f"(?P<{entry['intent']}>{body})"
+        if entry["match"] == "exact":
+            alternatives.append(f"{group}$")
+        elif entry["match"] == "contains":
+            alternatives.append(rf".*?\b{group}\b")
+        else:
+            raise ValueError(f"Unknown match type '{entry['match']}' for intent '{entry['intent']}'")
+    return re.compile("|".join(f"(?:{alt})" for alt in alternatives))
+
+
+class IntentRouter:
+    """Resolve built-in commands locally and count hits per intent"""
+
+    def __init__(self, table=None, fuzzy=None):
+        self.table = table or COMMAND_TABLE
+        self.pattern = compile_table(self.table)
+        if fuzzy is None:
+            fuzzy = os.getenv("ASSISTANT_FUZZY_INTENTS", "1") != "0"
+        self.fuzzy = fuzzy
+        self.examples = [(normalize(p), entry["intent"])
+                         for entry in self.table if entry.get("fuzzy")
+                         for p in entry["phrases"]]
+        self.required = {entry["intent"]: set(entry.get("requires", []))
+                         for entry in self.table}
+        self.hits = Counter()
+
+    def classify(self, text):
+        """Return the intent of the closest example phrase, or None"""
+        if len(text) < FUZZY_MIN_CHARS or len(text.split()) > FUZZY_MAX_WORDS:
+            return None
+        words = set(text.split())
+        best_intent, best_score = None, FUZZY_THRESHOLD
+        matcher = difflib.SequenceMatcher(b=text, autojunk=False)
+        for example, intent in self.examples:
+            # "switch to texas" is close to "switch to text" but not a mode switch
+            if not self.required[intent] <= words:
+                continue
+            matcher.set_seq1(example)
+            # Cheap upper bounds first, the full ratio is the expensive part
+            if matcher.real_quick_ratio() < best_score or matcher.quick_ratio() < best_score:
+                continue
+            score = matcher.ratio()
+            if score >= best_score:
+                best_intent, best_score = intent, score
+        return best_intent
+
+    def route(self, user_text):
+        """
+        Return the intent name for user_text, or None when it should go to the LLM.
+        """
+        text = normalize(user_text)
+        match = self.pattern.match(text)
+        if match:
+            intent = match.lastgroup
+            self.hits[intent] += 1
+            return intent
+        if self.fuzzy:
+            intent = self.classify(text)
+            if intent:
+                self.hits[intent] += 1
+                self.hits["fuzzy"] += 1
+                return intent
+        self.hits["llm"] += 1
+        return None
+
+    def report(self):
+        """Print per-intent hit counters"""
+        if not self.hits:
+            return
+        counts = ", ".join(f"{name}={count}" for name, count in self.hits.most_common())
+        print(f"[ROUTER] Intent hits: {counts}")
@@ -5,6 +5,7 @@ import time
 import requests
 import io  # <--- NEW IMPORT for in-memory image handling
 from deepface import DeepFace
+from detection_log import DetectionLog
 
 # ===========================
 #   LOAD EMBEDDING
@@ -34,6 +35,7 @@ def send_alert_with_photo(frame):
     """
     Encodes image to memory and sends to Telegram with a caption.
     No disk writing involved (prevents 'not downloadable' errors).
+    Returns True if Telegram accepted the photo.
     """
     try:
         # 1. Encode frame to JPEG in memory (Buffer)
@@ -41,7 +43,7 @@ def send_alert_with_photo(frame):
         
         if not ret:
             print("❌ Could not encode frame.")
-            return
+            return False
 
         # 2. Create an in-memory file object
         io_buf = io.BytesIO(buffer)
@@ -66,11 +68,14 @@ def send_alert_with_photo(frame):
 
         if response.status_code == 200:
             print("✅ Alert & Photo sent successfully!")
+            return True
         else:
             print(f"❌ Telegram Error: {response.text}")
+            return False
 
     except Exception as e:
         print("❌ Connection Error:", e)
+        return False
 
 # ===========================
 #   RECOGNITION SETTINGS
@@ -79,87 +84,115 @@ THRESHOLD = 0.5
 
 UNKNOWN_TIME_LIMIT = 5   # seconds
 
+KNOWN_NAME = "ANUSH"
+CAMERA_ID = 0
+
 unknown_start_time = None
 alert_sent = False
 
-cap = cv2.VideoCapture(0)
+# Every recognition result, unknown interval and alert goes to detections.db
+events = DetectionLog(camera=CAMERA_ID)
+
+def end_unknown_interval():
+    """Log the end of an unknown-person interval, if one is open"""
+    global unknown_start_time
+    if unknown_start_time is not None:
+        events.log("unknown_end", label="unknown", identity=KNOWN_NAME,
+                   duration=time.time() - unknown_start_time)
+    unknown_start_time = None
+
+cap = cv2.VideoCapture(CAMERA_ID)
 
 # ===========================
 #   MAIN LOOP
 # ===========================
-while True:
-    ret, frame = cap.read()
-    if not ret:
-        continue
-
-    # Copy frame for display/annotation so we don't send drawings to Telegram
-    display_frame = frame.copy()
-
-    try:
-        # DeepFace detection
-        emb = DeepFace.represent(
-            img_path=frame,
-            model_name="ArcFace",
-            detector_backend="opencv",
-            enforce_detection=False # Prevents crashing if no face found
-        )
-
-        # Check if a face was actually found
-        if len(emb) > 0:
-            emb_data = emb[0]["embedding"]
-            emb_np = np.array(emb_data)
-            emb_np = emb_np / np.linalg.norm(emb_np)
-
-            cos_sim = np.dot(avg_embedding, emb_np)
-            distance = 1 - cos_sim
-
-            if distance < THRESHOLD:
-                # --- Known person ---
-                label = "ANUSH"
-                color = (0, 255, 0)
-                unknown_start_time = None
-                alert_sent = False
+try:
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            continue
+
+        # Copy frame for display/annotation so we don't send drawings to Telegram
+        display_frame = frame.copy()
+
+        try:
+            # DeepFace detection
+            emb = DeepFace.represent(
+                img_path=frame,
+                model_name="ArcFace",
+                detector_backend="opencv",
+                enforce_detection=False # Prevents crashing if no face found
+            )
+
+            # Check if a face was actually found
+            if len(emb) > 0:
+                emb_data = emb[0]["embedding"]
+                emb_np = np.array(emb_data)
+                emb_np = emb_np / np.linalg.norm(emb_np)
+
+                cos_sim = np.dot(avg_embedding, emb_np)
+                distance = 1 - cos_sim
+
+                events.log("frame", label="known" if distance < THRESHOLD else "unknown",
+                           identity=KNOWN_NAME, similarity=cos_sim, distance=distance)
+
+                if distance < THRESHOLD:
+                    # --- Known person ---
+                    label = KNOWN_NAME
+                    color = (0, 255, 0)
+                    end_unknown_interval()
+                    alert_sent = False
+                else:
+                    # --- Unknown person ---
+                    label = "UNKNOWN"
+                    color = (0, 0, 255)
+
+                    if unknown_start_time is None:
+                        unknown_start_time = time.time()
+                        events.log("unknown_start", label="unknown", identity=KNOWN_NAME,
+                                   similarity=cos_sim, distance=distance)
+
+                    elapsed = time.time() - unknown_start_time
+                    countdown = UNKNOWN_TIME_LIMIT - int(elapsed)
+
+                    if countdown > 0:
+                        label += f" | Alert in {countdown}s"
+
+                    if elapsed >= UNKNOWN_TIME_LIMIT and not alert_sent:
+                        # Send the clean 'frame' (without text), not 'display_frame'
+                        sent = send_alert_with_photo(frame) 
+                        events.log("alert", label="unknown", duration=elapsed,
+                                   outcome="sent" if sent else "failed")
+                        alert_sent = True
             else:
-                # --- Unknown person ---
-                label = "UNKNOWN"
-                color = (0, 0, 255)
-
-                if unknown_start_time is None:
-                    unknown_start_time = time.time()
-
-                elapsed = time.time() - unknown_start_time
-                countdown = UNKNOWN_TIME_LIMIT - int(elapsed)
-
-                if countdown > 0:
-                    label += f" | Alert in {countdown}s"
+                # No face detected by DeepFace
+                label = "No Face"
+                color = (255, 255, 0)
+                events.log("frame", label="no_face")
+                end_unknown_interval()
+                alert_sent = False
 
-                if elapsed >= UNKNOWN_TIME_LIMIT and not alert_sent:
-                    # Send the clean 'frame' (without text), not 'display_frame'
-                    send_alert_with_photo(frame) 
-                    alert_sent = True
-        else:
-            # No face detected by DeepFace
-            label = "No Face"
+        except Exception as e:
+            # DeepFace error handling
+            label = "Scanning..."
             color = (255, 255, 0)
-            unknown_start_time = None
+            events.log("frame", label="error", outcome=type(e).__name__)
+            end_unknown_interval()
             alert_sent = False
+            # print(e) # Uncomment for debugging
 
-    except Exception as e:
-        # DeepFace error handling
-        label = "Scanning..."
-        color = (255, 255, 0)
-        unknown_start_time = None
-        alert_sent = False
-        # print(e) # Uncomment for debugging
-
-    # Draw label on the display frame only
-    cv2.putText(display_frame, label, (30, 50),
-                cv2.FONT_HERSHEY_SIMPLEX, 1.0, color, 2)
+        # Draw label on the display frame only
+        cv2.putText(display_frame, label, (30, 50),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1.0, color, 2)
 
-    cv2.imshow("Intruder Detection", display_frame)
+        cv2.imshow("Intruder Detection", display_frame)
 
-    if cv2.waitKey(1) & 0xFF == ord('q'):
-        break
+        if cv2.waitKey(1) & 0xFF == ord('q'):
+            break
+finally:
+    # Close the open unknown interval and flush the log even on Ctrl+C or a crash
+    end_unknown_interval()
+    events.close()
 
 cap.release()
 cv2.destroyAllWindows()
\ No newline at end of file
@@ -0,0 +1,115 @@
+# test_detection_log.py
+# Run with: python -m pytest test_detection_log.py
+import sqlite3
+import threading
+import time
+
+import pytest
+
+import detection_log
+from detection_log import DetectionLog, similarity_distribution, unknown_intervals
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "detections.db")
+
+
+def count_rows(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM detections").fetchone()[0]
+    finally:
+        conn.close()
+
+
+# -----------------------------
+#  WRITER
+# -----------------------------
+def test_close_flushes_queued_events(db_path):
+    log = DetectionLog(db_path, flush_interval=60)
+    for _ in range(3):
+        log.log("frame", label="no_face")
+    log.close()
+    assert count_rows(db_path) == 3
+    assert log.written == 3
+    assert not log.thread.is_alive()
+
+
+def test_full_queue_drops_events(db_path, monkeypatch):
+    monkeypatch.setattr(detection_log, "QUEUE_SIZE", 1)
+    # Hold the writer back so the queue stays full
+    gate = threading.Event()
+    writer = DetectionLog._writer
+    monkeypatch.setattr(DetectionLog, "_writer", lambda self: (gate.wait(), writer(self)))
+
+    log = DetectionLog(db_path)
+    for _ in range(4):
+        log.log("frame", label="no_face")
+    assert log.dropped == 3
+
+    gate.set()
+    log.close()
+    assert count_rows(db_path) == 1
+
+
+def test_prune_removes_events_past_retention(db_path):
+    now = time.time()
+    log = DetectionLog(db_path, retention_days=0)
+    log.log("frame", label="no_face", ts=now - 40 * 86400)
+    log.log("frame", label="no_face", ts=now - 10 * 86400)
+    log.close()
+    assert count_rows(db_path) == 2
+
+    # The writer prunes once when it starts
+    DetectionLog(db_path, retention_days=30).close()
+    conn = sqlite3.connect(db_path)
+    try:
+        assert [ts for (ts,) in conn.execute("SELECT ts FROM detections")] == [now - 10 * 86400]
+    finally:
+        conn.close()
+
+
+# -----------------------------
+#  QUERIES
+# -----------------------------
+def test_similarity_distribution(db_path):
+    log = DetectionLog(db_path, camera=1)
+    for similarity in (0.6, 0.7, 0.8, 0.9):
+        log.log("frame", label="known", identity="ANUSH", similarity=similarity)
+    log.log("frame", label="unknown", identity="ANUSH", similarity=-0.2)
+    log.log("frame", label="no_face")
+    log.close()
+
+    dist = similarity_distribution(db_path, bins=4)
+    assert list(dist) == ["ANUSH"]
+    stats = dist["ANUSH"]
+    assert stats["count"] == 5
+    assert stats["known_rate"] == pytest.approx(0.8)
+    assert stats["min"] == pytest.approx(-0.2)
+    assert stats["max"] == pytest.approx(0.9)
+    assert stats["mean"] == pytest.approx(0.56)
+    assert stats["p50"] == pytest.approx(0.7)
+    assert stats["p5"] <= stats["p50"] <= stats["p95"]
+    assert stats["histogram"] == [(-1.0, 0), (-0.5, 1), (0.0, 0), (0.5, 4)]
+
+    assert similarity_distribution(db_path, camera=2) == {}
+    assert similarity_distribution(db_path, identity="OTHER") == {}
+
+
+def test_unknown_intervals(db_path):
+    log = DetectionLog(db_path, retention_days=0)
+    log.log("unknown_start", label="unknown", ts=100.0)
+    log.log("unknown_end", label="unknown", duration=10.0, ts=110.0)
+    log.close()
+    assert unknown_intervals(db_path) == [(100.0, 10.0)]
+    assert log.unknown_intervals(since=200.0) == []
+
+
+def test_queries_do_not_create_missing_db(tmp_path):
+    path = tmp_path / "missing.db"
+    with pytest.raises(FileNotFoundError):
+        similarity_distribution(str(path))
+    with pytest.raises(FileNotFoundError):
+        unknown_intervals(str(path))
+    assert not path.exists()
@@ -0,0 +1,105 @@
+# test_intent_router.py
+# Run with: python -m pytest test_intent_router.py
+import pytest
+
+from intent_router import IntentRouter, COMMAND_TABLE, compile_table, normalize
+
+
+@pytest.fixture
+def router():
+    return IntentRouter(fuzzy=True)
+
+
+# -----------------------------
+#  PRIORITY (same order as the old keyword chain in main.py)
+# -----------------------------
+@pytest.mark.parametrize("text, intent", [
+    # mode switches win over everything else
+    ("switch to text", "switch_text"),
+    ("Text mode please", "switch_text"),
+    ("schedule something then use text", "switch_text"),
+    ("use voice", "switch_voice"),
+    ("what are my tasks in voice mode", "switch_voice"),
+    ("exit text mode", "switch_text"),
+    # exact 'schedule' starts scheduling before the schedule keywords
+    ("schedule", "schedule_task"),
+    ("Shedule.", "schedule_task"),
+    # schedule keywords
+    ("schedule for today", "list_schedules"),
+    ("show me my schedule", "list_schedules"),
+    ("What are my tasks?", "list_schedules"),
+    ("what's scheduled", "list_schedules"),
+    ("whats scheduled", "list_schedules"),
+    ("what is scheduled for today", "list_schedules"),
+    ("do I have anything scheduled", "list_schedules"),
+    ("scheduled flights to paris", "list_schedules"),
+    ("add a task", "list_schedules"),
+    ("stop the task", "list_schedules"),
+    # exit only as the whole utterance
+    ("exit", "exit"),
+    ("Goodbye!", "exit"),
+    ("  STOP ", "exit"),
+])
+def test_table_priority(router, text, intent):
+    assert router.route(text) == intent
+
+
+@pytest.mark.parametrize("text", [
+    # near misses of exit must never end the session
+    "quiet", "top", "exist", "stops", "exits", "quite", "goodbye everyone",
+    "please stop", "exit strategy",
+    # near misses of the schedule keywords
+    "what do you have", "multitasking", "rescheduling",
+    # near misses of the mode switches
+    "textbook prices", "use next", "voicemail",
+    "switch to texas", "switch to next", "use texts", "use voices", "switch to choice",
+    # ordinary questions
+    "What is the capital of France?", "hello there",
+])
+def test_near_misses_go_to_llm(router, text):
+    assert router.route(text) is None
+
+
+def test_fuzzy_matches_typos_of_safe_commands(router):
+    assert router.route("swich to text") == "switch_text"
+    assert router.route("voice mod") == "switch_voice"
+    assert router.route("swtich to voice") == "switch_voice"
+    assert router.route("sedule") == "schedule_task"
+    assert router.hits["fuzzy"] == 4
+
+
+def test_fuzzy_never_picks_exit_or_list(router):
+    assert "exit" not in {intent for _, intent in router.examples}
+    assert "list_schedules" not in {intent for _, intent in router.examples}
+    assert router.route("exitt") is None
+    assert router.route("goodby") is None
+
+
+def test_fuzzy_disabled():
+    router = IntentRouter(fuzzy=False)
+    assert router.route("swich to text") is None
+    assert router.route("switch to text") == "switch_text"
+
+
+def test_fuzzy_disabled_by_env(monkeypatch):
+    monkeypatch.setenv("ASSISTANT_FUZZY_INTENTS", "0")
+    assert IntentRouter().fuzzy is False
+
+
+def test_hit_counters(router):
+    router.route("exit")
+    router.route("exit")
+    router.route("tell me a joke")
+    assert router.hits["exit"] == 2
+    assert router.hits["llm"] == 1
+
+
+def test_normalize():
+    assert normalize("  Switch   to TEXT!! ") == "switch to text"
+    assert normalize("What's scheduled?") == "what's scheduled"
+
+
+def test_compile_table_rejects_unknown_match_type():
+    table = COMMAND_TABLE + [{"intent": "bad", "match": "prefix", "phrases": ["x"]}]
+    with pytest.raises(ValueError):
+        compile_table(table)
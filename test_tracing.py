@@ -0,0 +1,135 @@
+# test_tracing.py
+# Run with: python -m pytest test_tracing.py
+import json
+
+import pytest
+
+from tracing import Tracer, percentile, TRACE_FILE, METRICS_FILE
+
+
+@pytest.fixture
+def tracer(tmp_path):
+    tracer = Tracer(enabled=True, trace_dir=str(tmp_path))
+    yield tracer
+    tracer.close()
+
+
+def read_turns(tmp_path):
+    with open(tmp_path / TRACE_FILE, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+# -----------------------------
+#  PERCENTILE
+# -----------------------------
+@pytest.mark.parametrize("q, expected", [
+    (0.0, 1), (0.01, 1), (0.5, 50), (0.95, 95), (0.99, 99), (1.0, 100),
+])
+def test_percentile_nearest_rank(q, expected):
+    assert percentile(list(range(1, 101)), q) == expected
+
+
+def test_percentile_small_lists():
+    assert percentile([], 0.5) == 0.0
+    assert percentile([7.0], 0.99) == 7.0
+    assert percentile([1.0, 2.0, 3.0], 0.5) == 2.0
+
+
+# -----------------------------
+#  TURNS
+# -----------------------------
+def test_turns_are_written_as_jsonl(tracer, tmp_path):
+    turn_id = tracer.start_turn()
+    with tracer.span("listen"):
+        pass
+    with tracer.span("llm"):
+        pass
+    tracer.end_turn()
+
+    [record] = read_turns(tmp_path)
+    assert record["turn_id"] == turn_id
+    assert [span["stage"] for span in record["spans"]] == ["listen", "llm"]
+    assert record["spans"][0]["start_ms"] <= record["spans"][1]["start_ms"]
+    assert record["total_ms"] >= sum(span["ms"] for span in record["spans"])
+    assert "no_input" not in record
+    assert tracer.counts == {"listen": 1, "llm": 1, "turn": 1}
+
+
+def test_no_input_turns_stay_out_of_histograms(tracer, tmp_path):
+    tracer.start_turn()
+    with tracer.span("listen"):
+        pass
+    tracer.end_turn(no_input=True)
+    assert tracer.summary() == {}
+
+    tracer.start_turn()
+    with tracer.span("listen"):
+        pass
+    tracer.end_turn()
+
+    records = read_turns(tmp_path)
+    assert [r.get("no_input", False) for r in records] == [True, False]
+    assert tracer.counts == {"listen": 1, "turn": 1}
+
+
+def test_start_turn_closes_the_open_turn(tracer, tmp_path):
+    tracer.start_turn()
+    tracer.start_turn()
+    tracer.end_turn()
+    assert len(read_turns(tmp_path)) == 2
+
+
+def test_spans_outside_a_turn_are_recorded_directly(tracer, tmp_path):
+    @tracer.wrap("db")
+    def query():
+        return 42
+
+    assert query() == 42
+    assert tracer.counts["db"] == 1
+    assert not (tmp_path / TRACE_FILE).exists()
+
+
+# -----------------------------
+#  EXPORT
+# -----------------------------
+def test_prometheus_text(tracer):
+    for ms in range(1, 101):
+        tracer.record("llm", float(ms))
+    tracer.record("tts", 5.0)
+    text = tracer.prometheus_text()
+    lines = text.splitlines()
+
+    assert lines[0].startswith("# HELP assistant_stage_latency_ms")
+    assert lines[1] == "# TYPE assistant_stage_latency_ms summary"
+    assert 'assistant_stage_latency_ms{stage="llm",quantile="0.5"} 50.000' in lines
+    assert 'assistant_stage_latency_ms{stage="llm",quantile="0.95"} 95.000' in lines
+    assert 'assistant_stage_latency_ms{stage="llm",quantile="0.99"} 99.000' in lines
+    assert 'assistant_stage_latency_ms_sum{stage="llm"} 5050.000' in lines
+    assert 'assistant_stage_latency_ms_count{stage="llm"} 100' in lines
+    assert 'assistant_stage_latency_ms_count{stage="tts"} 1' in lines
+    # Stages are sorted, so llm comes before tts
+    assert text.index('stage="llm"') < text.index('stage="tts"')
+    assert text.endswith("\n")
+
+
+def test_end_turn_writes_snapshot(tracer, tmp_path):
+    tracer.start_turn()
+    tracer.end_turn()
+    with open(tmp_path / METRICS_FILE, encoding="utf-8") as f:
+        assert f.read() == tracer.prometheus_text()
+
+
+def test_disabled_tracer_is_a_no_op(tmp_path):
+    tracer = Tracer(enabled=False, trace_dir=str(tmp_path / "traces"))
+
+    def func():
+        return 1
+
+    assert tracer.wrap("db")(func) is func
+    assert tracer.start_turn() is None
+    with tracer.span("llm"):
+        pass
+    tracer.end_turn()
+    tracer.write_snapshot()
+    assert tracer.summary() == {}
+    assert not (tmp_path / "traces").exists()
@@ -0,0 +1,233 @@
+# tracing.py
+"""
+Lightweight per-turn latency tracing for the voice assistant.
+
+Each assistant turn gets a turn ID and a list of timed spans (listen,
+recognition, LLM, TTS, DB, ...). Finished turns are appended to a rotating
+JSONL file and every span duration feeds a per-stage histogram, which is
+exported as a Prometheus-style text snapshot with p50/p95/p99.
+
+Tracing is off unless ASSISTANT_TRACE=1; when disabled span() hands back a
+shared no-op context manager, so instrumented code pays one attribute check.
+"""
+import os
+import json
+import functools
+import math
+import time
+import logging
+import logging.handlers
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+TRACE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "traces")
+TRACE_FILE = "turns.jsonl"
+METRICS_FILE = "metrics.prom"
+MAX_TRACE_BYTES = 5 * 1024 * 1024
+TRACE_BACKUPS = 3
+# Samples kept per stage for the percentile estimates
+HISTOGRAM_SIZE = 2048
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class _NullSpan:
+    """Context manager used when tracing is disabled"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values), max(1, math.ceil(q * len(sorted_values)))) - 1
+    return sorted_values[index]
+
+
+class Tracer:
+    """Collect spans per turn and aggregate them into latency histograms"""
+
+    def __init__(self, enabled=False, trace_dir=TRACE_DIR):
+        self.enabled = enabled
+        self.trace_dir = trace_dir
+        self.turn_id = None
+        self.turn_start = None
+        self.spans = []
+        self.turn_count = 0
+        self.samples = defaultdict(lambda: deque(maxlen=HISTOGRAM_SIZE))
+        self.totals = defaultdict(float)
+        self.counts = defaultdict(int)
+        # Opened on the first finished turn, so trace_dir can still be changed
+        self._log = None
+
+    @classmethod
+    def from_env(cls):
+        return cls(enabled=os.getenv("ASSISTANT_TRACE", "0") == "1",
+                   trace_dir=os.getenv("ASSISTANT_TRACE_DIR", TRACE_DIR))
+
+    def _open_log(self):
+        """Open the rotating JSONL trace under trace_dir"""
+        os.makedirs(self.trace_dir, exist_ok=True)
+        # Own logger so turn records never end up in the root handlers
+        self._log = logging.getLogger(f"assistant.trace.{id(self)}")
+        self._log.propagate = False
+        self._log.setLevel(logging.INFO)
+        handler = logging.handlers.RotatingFileHandler(
+            os.path.join(self.trace_dir, TRACE_FILE),
+            maxBytes=MAX_TRACE_BYTES, backupCount=TRACE_BACKUPS, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        self._log.addHandler(handler)
+
+    def close(self):
+        """Close the trace file (it is reopened if more turns are recorded)"""
+        if self._log is None:
+            return
+        for handler in list(self._log.handlers):
+            self._log.removeHandler(handler)
+            handler.close()
+        self._log = None
+
+    # -----------------------------
+    #  TURNS AND SPANS
+    # -----------------------------
+    def start_turn(self):
+        """Begin a new turn, closing the previous one if it is still open"""
+        if not self.enabled:
+            return None
+        self.end_turn()
+        self.turn_count += 1
+        self.turn_id = f"{int(time.time())}-{self.turn_count}"
+        self.turn_start = time.perf_counter()
+        self.spans = []
+        return self.turn_id
+
+    def end_turn(self, no_input=False):
+        """
+        Write the current turn to the JSONL trace and refresh the snapshot.
+        Turns without an utterance (no_input=True) are flagged in the trace
+        but kept out of the histograms.
+        """
+        if not self.enabled or self.turn_id is None:
+            return
+        total_ms = (time.perf_counter() - self.turn_start) * 1000
+        record = {
+            "turn_id": self.turn_id,
+            "ts": time.time(),
+            "total_ms": round(total_ms, 3),
+            "spans": self.spans,
+        }
+        if no_input:
+            record["no_input"] = True
+        else:
+            for span in self.spans:
+                self.record(span["stage"], span["ms"])
+            self.record("turn", total_ms)
+        if self._log is None:
+            self._open_log()
+        self._log.info(json.dumps(record))
+        self.turn_id = None
+        self.spans = []
+        self.write_snapshot()
+
+    def span(self, stage):
+        """Time a block of code as one stage of the current turn"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return self._timed(stage)
+
+    def wrap(self, stage):
+        """Decorator form of span(); a no-op when tracing is disabled"""
+        def decorator(func):
+            if not self.enabled:
+                return func
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self._timed(stage):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    @contextmanager
+    def _timed(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            # Spans inside a turn are recorded when the turn ends
+            if self.turn_id is None:
+                self.record(stage, duration_ms)
+            else:
+                self.spans.append({
+                    "stage": stage,
+                    "start_ms": round((start - self.turn_start) * 1000, 3),
+                    "ms": round(duration_ms, 3),
+                })
+
+    def record(self, stage, duration_ms):
+        """Add one duration sample to the stage histogram"""
+        self.samples[stage].append(duration_ms)
+        self.totals[stage] += duration_ms
+        self.counts[stage] += 1
+
+    # -----------------------------
+    #  AGGREGATION AND EXPORT
+    # -----------------------------
+    def summary(self):
+        """Return {stage: {"count", "sum_ms", "p50", "p95", "p99"}}"""
+        result = {}
+        for stage, values in self.samples.items():
+            ordered = sorted(values)
+            stats = {"count": self.counts[stage], "sum_ms": self.totals[stage]}
+            for q in QUANTILES:
+                stats[f"p{int(q * 100)}"] = percentile(ordered, q)
+            result[stage] = stats
+        return result
+
+    def prometheus_text(self):
+        """Render the histograms in the Prometheus text exposition format"""
+        lines = [
+            "# HELP assistant_stage_latency_ms Latency of each assistant stage in milliseconds.",
+            "# TYPE assistant_stage_latency_ms summary",
+        ]
+        for stage, stats in sorted(self.summary().items()):
+            for q in QUANTILES:
+                value = stats[f"p{int(q * 100)}"]
+                lines.append(f'assistant_stage_latency_ms{{stage="{stage}",quantile="{q}"}} {value:.3f}')
+            lines.append(f'assistant_stage_latency_ms_sum{{stage="{stage}"}} {stats["sum_ms"]:.3f}')
+            lines.append(f'assistant_stage_latency_ms_count{{stage="{stage}"}} {stats["count"]}')
+        return "\n".join(lines) + "\n"
+
+    def write_snapshot(self):
+        """Atomically replace the Prometheus snapshot file"""
+        if not self.enabled:
+            return
+        os.makedirs(self.trace_dir, exist_ok=True)
+        path = os.path.join(self.trace_dir, METRICS_FILE)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp_path, path)
+
+    def report(self):
+        """Print p50/p95/p99 per stage"""
+        if not self.enabled:
+            return
+        self.end_turn()
+        print("[TRACE] Stage latency (ms):")
+        for stage, stats in sorted(self.summary().items()):
+            print(f"  {stage:<14} n={stats['count']:<5} p50={stats['p50']:.1f} "
+                  f"p95={stats['p95']:.1f} p99={stats['p99']:.1f}")
+        print(f"[TRACE] Traces written to: {self.trace_dir}")
+
+
+# Shared tracer used by main.py
+tracer = Tracer.from_env()